@@ -1,5 +1,6 @@
 from typing import List, Optional, Dict, Any, TYPE_CHECKING
 from datetime import datetime
+from collections import Counter, defaultdict
 import pandas as pd
 import geopandas as gpd
 from geopy.distance import geodesic
@@ -918,8 +919,8 @@ class CoverageData:
         start_date = today - pd.Timedelta(days=6)
         
         # Track visits and unique DUs per day
-        daily_visits = {}
-        daily_dus = {}
+        daily_visits = Counter()
+        daily_dus = defaultdict(set)
         
         for service_point in self.service_points:
             if not service_point.visit_date:
@@ -933,11 +934,9 @@ class CoverageData:
                 continue
             
             # Count visits per day
-            daily_visits[visit_date] = daily_visits.get(visit_date, 0) + 1
+            daily_visits[visit_date] += 1
             
             # Track unique DUs per day
-            if visit_date not in daily_dus:
-                daily_dus[visit_date] = set()
             daily_dus[visit_date].add(service_point.du_name)
         
         # Calculate averages
@@ -7,9 +7,13 @@ CoverageData objects to analyze differences between opportunities/projects.
 
 import os
 import pandas as pd
+import numpy as np
 from datetime import datetime, date
 from typing import Dict, List, Any
 import json
+import warnings
+import html
+from string import Template
 
 try:
     # When imported as a module
@@ -49,13 +53,10 @@ def create_opportunity_comparison_report(coverage_data_objects: Dict[str, Covera
     # Generate progress data for charts
     progress_data = _generate_progress_data(coverage_data_objects, clumping_ratio, lookback_days)
     
-    # Generate HTML report
-    html_content = _generate_html_report(comparison_stats, coverage_data_objects, progress_data, lookback_days)
-    
-    # Write to file
+    # Write HTML report directly to file
     filename = "opportunity_comparison_report.html"
     with open(filename, "w", encoding="utf-8") as f:
-        f.write(html_content)
+        _write_html_report(f, comparison_stats, coverage_data_objects, progress_data, lookback_days)
     
     print(f"Opportunity analysis report saved as: {filename}")
     return filename
@@ -79,18 +80,28 @@ def _generate_comparison_statistics(coverage_data_objects: Dict[str, CoverageDat
     
     # Extract basic stats for each project
     for project_key, coverage_data in coverage_data_objects.items():
+        dus_per_day, visits_per_day = coverage_data.get_average_visits_data()
+        completed_dus_count = sum(1 for du in coverage_data.delivery_units.values() if du.status == 'completed')
+        
+        # Count started and completed service areas in a single pass
+        started_sas_count = 0
+        completed_sas_count = 0
+        for sa in coverage_data.service_areas.values():
+            started_sas_count += sa.is_started
+            completed_sas_count += sa.is_completed
+        
         project_stats = {
             'opportunity_name': getattr(coverage_data, 'opportunity_name', project_key),
             'project_space': getattr(coverage_data, 'project_space', 'Unknown'),
             'delivery_units_count': len(coverage_data.delivery_units) if coverage_data.delivery_units else 0,
             'service_points_count': len(coverage_data.service_points) if coverage_data.service_points else 0,
-            'visits_per_day' : coverage_data.get_average_visits_data()[1],
-            'completed_dus_count': len([du for du in coverage_data.delivery_units.values() if du.status == 'completed']) if coverage_data.delivery_units else 0,
-            'dus_per_day' : coverage_data.get_average_visits_data()[0],
+            'visits_per_day' : visits_per_day,
+            'completed_dus_count': completed_dus_count,
+            'dus_per_day' : dus_per_day,
             'total_flws': len(coverage_data.flws) if coverage_data.flws else 0,
             'total_service_areas': len(coverage_data.service_areas) if coverage_data.service_areas else 0,
-            'started_sas_count': len([sa for sa in coverage_data.service_areas.values() if sa.is_started]) if coverage_data.service_areas else 0,
-            'completed_sas_count': len([sa for sa in coverage_data.service_areas.values() if sa.is_completed]) if coverage_data.service_areas else 0,
+            'started_sas_count': started_sas_count,
+            'completed_sas_count': completed_sas_count,
             'active_flw_last7days': coverage_data.get_active_flws_last7days()
         }
         
@@ -111,18 +122,27 @@ def _generate_comparison_statistics(coverage_data_objects: Dict[str, CoverageDat
         
         stats['projects'][project_key] = project_stats
     
-    # Generate cross-project comparisons
-    stats['summary_comparisons'] = {
-        'total_delivery_units': sum(p['delivery_units_count'] for p in stats['projects'].values()),
-        'total_service_points': sum(p['service_points_count'] for p in stats['projects'].values()),
-        'total_completed_dus': sum(p['completed_dus_count'] for p in stats['projects'].values()),
-        'total_service_areas': sum(p['total_service_areas'] for p in stats['projects'].values()),
-        'total_started_sas': sum(p['started_sas_count'] for p in stats['projects'].values()),
-        'total_completed_sas': sum(p['completed_sas_count'] for p in stats['projects'].values()),
-        'average_coverage': sum(p['coverage_percentage'] for p in stats['projects'].values()) / len(stats['projects']) if stats['projects'] else 0,
-        'total_flws': sum(p['total_flws'] for p in stats['projects'].values()),
+    # Summary totals, each the sum of one per-project column
+    summary_total_columns = {
+        'total_delivery_units': 'delivery_units_count',
+        'total_service_points': 'service_points_count',
+        'total_completed_dus': 'completed_dus_count',
+        'total_service_areas': 'total_service_areas',
+        'total_started_sas': 'started_sas_count',
+        'total_completed_sas': 'completed_sas_count',
+        'total_flws': 'total_flws',
     }
     
+    if not stats['projects']:
+        stats['summary_comparisons'] = {**dict.fromkeys(summary_total_columns, 0), 'average_coverage': 0}
+        return stats
+    
+    # Generate cross-project comparisons as column reductions over a per-project table
+    projects_df = pd.DataFrame.from_dict(stats['projects'], orient='index')
+    totals = projects_df[list(summary_total_columns.values())].sum().to_dict()
+    stats['summary_comparisons'] = {summary_key: totals[column] for summary_key, column in summary_total_columns.items()}
+    stats['summary_comparisons']['average_coverage'] = float(projects_df['coverage_percentage'].mean())
+    
     return stats
 
 
@@ -141,349 +161,421 @@ def _generate_progress_data(coverage_data_objects: Dict[str, CoverageData], clum
     progress_data = {
         'service_delivery_progress': {},
         'du_completion_progress': {},
-        'cumulative_service_delivery': {},
-        'cumulative_du_completion': {},
         'clumped_dus_progress': {}
     }
     
+    # Each series carries both daily and cumulative counts and is emitted once; the daily and
+    # cumulative charts read the same series
     for project_key, coverage_data in coverage_data_objects.items():
         opportunity_name = getattr(coverage_data, 'opportunity_name', project_key)
+        progress = _compute_project_progress(_collect_progress_inputs(coverage_data), clumping_ratio, lookback_days)
         
-        # Process service delivery data
-        service_delivery_by_day = {}
-        for point in coverage_data.service_points:
-            if point.visit_date:
-                visit_date = pd.to_datetime(point.visit_date).date()
-                if visit_date not in service_delivery_by_day:
-                    service_delivery_by_day[visit_date] = 0
-                service_delivery_by_day[visit_date] += 1
-        
-        # Process DU completion data and identify clumped DUs
-        # JJ: When this was first written was having a lot of issues with the NaT and str issues, I think now resolved.-
-        du_completion_by_day = {}
-        clumped_dus_by_day = {}
-        
-        for du in coverage_data.delivery_units.values():
-            if du.status == 'completed':
-                if isinstance(du.computed_du_completion_date, datetime):
-                    completion_date = du.computed_du_completion_date.date()
-                    # Add this check to catch NaT that slipped through
-                    if pd.isna(completion_date):
-                        #print(f"DU {du.du_name} is marked as completed but has no computed completion date, ignoring this DU in oppurtunity statistics")
-                        continue
-                    
-                    # Track regular DU completions
-                    if completion_date not in du_completion_by_day:
-                        du_completion_by_day[completion_date] = 0
-                    du_completion_by_day[completion_date] += 1
-                    
-                    # Check if this is a clumped DU
-                    is_clumped = False
-                    clumping_value = len(du.service_points) / du.buildings
-                    if clumping_value > clumping_ratio:
-                        is_clumped = True
-
-                    # Track clumped DU completions
-                    if is_clumped:
-                        if completion_date not in clumped_dus_by_day:
-                            clumped_dus_by_day[completion_date] = []
-                        clumped_dus_by_day[completion_date].append(du)
-                else:
-                    #print(f"DU {du.du_name} is marked as completed but has no computed completion date, ignoring this DU in oppurtunity statistics")    
-                    continue
-                 
-        # Convert to days since start for each opportunity
-        if service_delivery_by_day:
-            first_service_date = min(service_delivery_by_day.keys())
-            service_progress = []
-            cumulative_services = 0
-            
-            # Create a complete date range
-            if service_delivery_by_day:
-                last_service_date = max(service_delivery_by_day.keys())
-                current_date = first_service_date
-                while current_date <= last_service_date:
-                    day_number = (current_date - first_service_date).days
-                    daily_count = service_delivery_by_day.get(current_date, 0)
-                    cumulative_services += daily_count
-                    
-                    service_progress.append({
-                        'day': day_number,
-                        'daily_count': daily_count,
-                        'cumulative_count': cumulative_services
-                    })
-                    
-                    current_date = pd.to_datetime(current_date) + pd.Timedelta(days=1)
-                    current_date = current_date.date()
-            
-            progress_data['service_delivery_progress'][opportunity_name] = service_progress
-            progress_data['cumulative_service_delivery'][opportunity_name] = service_progress
+        if progress['service_progress'] is not None:
+            progress_data['service_delivery_progress'][opportunity_name] = progress['service_progress']
         
-        if du_completion_by_day:
-            first_completion_date = min(du_completion_by_day.keys())
-            du_progress = []
-            cumulative_dus = 0
-            
-            # Create a complete date range
-            if du_completion_by_day:
-                last_completion_date = max(du_completion_by_day.keys())
-                current_date = first_completion_date
-                while current_date <= last_completion_date:
-                    day_number = (current_date - first_completion_date).days
-                    daily_count = du_completion_by_day.get(current_date, 0)
-                    cumulative_dus += daily_count
-                    
-                    du_progress.append({
-                        'day': day_number,
-                        'daily_count': daily_count,
-                        'cumulative_count': cumulative_dus
-                    })
-                    
-                    current_date = pd.to_datetime(current_date) + pd.Timedelta(days=1)
-                    current_date = current_date.date()
-            
-            progress_data['du_completion_progress'][opportunity_name] = du_progress
-            progress_data['cumulative_du_completion'][opportunity_name] = du_progress
+        if progress['du_progress'] is not None:
+            progress_data['du_completion_progress'][opportunity_name] = progress['du_progress']
         
-        # Process clumped DUs progress data
-        if clumped_dus_by_day:
-            clumped_progress = []
-            cumulative_clumped = 0
-            
-            # Create a complete date range
-            if clumped_dus_by_day:
-                last_clumped_date = max(clumped_dus_by_day.keys())
-                current_date = first_completion_date
-                while current_date <= last_clumped_date:
-                    day_number = (current_date - first_completion_date).days
-                    daily_clumped_dus = clumped_dus_by_day.get(current_date, [])
-                    daily_count = len(daily_clumped_dus)
-                    cumulative_clumped += daily_count
-                    
-                    # Calculate unique FLWs who completed clumped DUs in the past N days
-                    lookback_start_date = current_date - pd.Timedelta(days=lookback_days-1)
-                    unique_flws_in_lookback = set()
-                    
-                    # Look through all dates in the lookback window
-                    check_date = lookback_start_date
-                    while check_date <= current_date:
-                        if check_date in clumped_dus_by_day:
-                            for clumped_du in clumped_dus_by_day[check_date]:
-                                # Get FLW associated with this DU
-                                flw = coverage_data.flws[clumped_du.flw_commcare_id]
-                                unique_flws_in_lookback.add(flw.id)
-                        check_date += pd.Timedelta(days=1)
-                    
-                    clumped_progress.append({
-                        'day': day_number,
-                        'daily_count': daily_count,
-                        'cumulative_count': cumulative_clumped,
-                        'clumped_dus': daily_clumped_dus,
-                        'unique_flws_in_lookback': list(unique_flws_in_lookback),
-                        'unique_flws_count_in_lookback': len(unique_flws_in_lookback)
-                    })
-                    
-                    current_date = pd.to_datetime(current_date) + pd.Timedelta(days=1)
-                    current_date = current_date.date()
-            
-            progress_data['clumped_dus_progress'][opportunity_name] = clumped_progress
+        if progress['clumped_progress'] is not None:
+            progress_data['clumped_dus_progress'][opportunity_name] = progress['clumped_progress']
     
     return progress_data
 
 
-def _generate_html_report(comparison_stats: Dict[str, Any], coverage_data_objects: Dict[str, CoverageData], progress_data: Dict[str, Any], lookback_days: int = 10) -> str:
+def _collect_progress_inputs(coverage_data: CoverageData) -> Dict[str, Any]:
     """
-    Generate HTML content for the comparison report.
+    Collect the plain per-project columns needed to compute progress data.
+    
+    Only dates, ids and counts are extracted, so the progress computation itself does not
+    touch the model objects.
     
     Args:
-        comparison_stats: Dictionary containing comparison statistics
-        coverage_data_objects: Dictionary mapping project keys to CoverageData objects
-        progress_data: Dictionary containing progress data for charts
+        coverage_data: CoverageData object for one project
+        
+    Returns:
+        Dict containing visit dates and parallel lists describing each completed DU
+    """
+    # Process DU completion data
+    # JJ: When this was first written was having a lot of issues with the NaT and str issues, I think now resolved.-
+    # Collect completed DUs into parallel columns in a single pass
+    completion_dates = []
+    completion_flw_commcare_ids = []
+    completion_services_counts = []
+    completion_buildings = []
+    
+    for du in coverage_data.delivery_units.values():
+        if du.status == 'completed':
+            if isinstance(du.computed_du_completion_date, datetime):
+                # Add this check to catch NaT that slipped through (NaT is a datetime subclass and a singleton)
+                if du.computed_du_completion_date is pd.NaT:
+                    #print(f"DU {du.du_name} is marked as completed but has no computed completion date, ignoring this DU in oppurtunity statistics")
+                    continue
+                completion_date = du.computed_du_completion_date.date()
+                
+                completion_dates.append(completion_date)
+                completion_flw_commcare_ids.append(du.flw_commcare_id)
+                completion_services_counts.append(len(du.service_points))
+                completion_buildings.append(du.buildings)
+            else:
+                #print(f"DU {du.du_name} is marked as completed but has no computed completion date, ignoring this DU in oppurtunity statistics")    
+                continue
+    
+    return {
+        'visit_dates': [point.visit_date for point in coverage_data.service_points if point.visit_date],
+        'completion_dates': completion_dates,
+        'completion_flw_commcare_ids': completion_flw_commcare_ids,
+        'completion_services_counts': completion_services_counts,
+        'completion_buildings': completion_buildings,
+        'flw_id_by_commcare_id': {commcare_id: flw.id for commcare_id, flw in coverage_data.flws.items()}
+    }
+
+
+def _compute_project_progress(progress_inputs: Dict[str, Any], clumping_ratio: float = 10.0, lookback_days: int = 10) -> Dict[str, Any]:
+    """
+    Compute service delivery, DU completion and clumped DU progress for one project.
+    
+    Args:
+        progress_inputs: Per-project columns from _collect_progress_inputs
+        clumping_ratio: Ratio threshold for identifying clumped DUs (services_count / building_count)
         lookback_days: Number of days to look back for unique FLW calculation
         
     Returns:
-        str: HTML content for the report
+        Dict with 'service_progress', 'du_progress' and 'clumped_progress', each None if the project has no such data
     """
+    project_progress = {
+        'service_progress': None,
+        'du_progress': None,
+        'clumped_progress': None
+    }
     
-    # Generate project comparison table
-    project_rows = ""
-    for project_key, project_stats in comparison_stats['projects'].items():
-        project_rows += f"""
-        <tr>
-            <td>{project_stats['opportunity_name']}</td>
-            <td>{project_stats['project_space']}</td>
-            <td>{project_stats['delivery_units_count']}</td>
-            <td>{project_stats['completed_dus_count']}</td>
-            <td>{project_stats['dus_per_day']}</td>
-            <td>{project_stats['service_points_count']}</td>
-            <td>{project_stats['visits_per_day']}</td>
-            <td>{project_stats['total_service_areas']}</td>
-            <td>{project_stats['started_sas_count']}</td>
-            <td>{project_stats['completed_sas_count']}</td>
-            <td>{project_stats['total_flws']}</td>
-            <td>{project_stats['active_flw_last7days']}</td>
-            <td>{project_stats['pct_active_flw_last7days']:.1f}%</td>
-            <td>{project_stats['coverage_percentage']:.1f}%</td>
-        </tr>
-        """
+    # Process service delivery data - parse all visit dates in one vectorized pass
+    visit_dates = pd.Series(progress_inputs['visit_dates'], dtype=object)
+    visit_days = _parse_visit_days(visit_dates)
+    service_delivery_by_day = visit_days.value_counts().to_dict()
     
-    # Convert progress data to JSON for JavaScript
-    progress_data_json = json.dumps(progress_data, default=str)
+    # A DU is clumped when services_count / buildings exceeds the clumping ratio; compared in
+    # multiplied form so DUs with no buildings do not divide by zero
+    services_counts = np.array(progress_inputs['completion_services_counts'], dtype=np.int64)
+    buildings = np.array(progress_inputs['completion_buildings'], dtype=np.int64)
     
-    # Determine if this is a single project or comparison
-    is_single_project = len(coverage_data_objects) == 1
-    report_title = "Opportunity Analysis Report" if is_single_project else "Opportunity Comparison Report"
-    note_text = "Progress charts show days since the opportunity's first active day (Day 0 = first service delivery or DU completion)." if is_single_project else "Progress charts show days since each opportunity's first active day (Day 0 = first service delivery or DU completion for that opportunity)."
+    du_completions = pd.DataFrame({
+        'completion_date': pd.Series(progress_inputs['completion_dates'], dtype=object),
+        'flw_commcare_id': pd.Series(progress_inputs['completion_flw_commcare_ids'], dtype=object),
+        'is_clumped': services_counts > clumping_ratio * buildings
+    })
+    
+    # Group completions by day
+    du_completion_by_day = du_completions['completion_date'].value_counts().to_dict()
+    
+    # Resolve FLW ids once per FLW rather than once per DU
+    clumped_completions = du_completions[du_completions['is_clumped']].assign(
+        flw_id=lambda df: df['flw_commcare_id'].map(progress_inputs['flw_id_by_commcare_id'])
+    )
+    clumped_dus_by_day = clumped_completions['completion_date'].value_counts().to_dict()
+    
+    # Intern FLW ids so each day's lookback list is stored as indices into one per-project table
+    clumped_flw_idx, clumped_flw_ids = pd.factorize(clumped_completions['flw_id'], use_na_sentinel=False)
+    
+    # Convert to days since start for the opportunity
+    if service_delivery_by_day:
+        first_service_date = min(service_delivery_by_day.keys())
+        last_service_date = max(service_delivery_by_day.keys())
+        
+        # Create a complete date range
+        daily_services = _daily_counts_series(service_delivery_by_day, first_service_date, last_service_date)
+        project_progress['service_progress'] = [
+            {
+                'day': day_number,
+                'daily_count': daily_count,
+                'cumulative_count': cumulative_count
+            }
+            for day_number, (daily_count, cumulative_count) in enumerate(zip(daily_services.tolist(), daily_services.cumsum().tolist()))
+        ]
+    
+    if du_completion_by_day:
+        first_completion_date = min(du_completion_by_day.keys())
+        last_completion_date = max(du_completion_by_day.keys())
+        
+        # Create a complete date range
+        daily_dus = _daily_counts_series(du_completion_by_day, first_completion_date, last_completion_date)
+        project_progress['du_progress'] = [
+            {
+                'day': day_number,
+                'daily_count': daily_count,
+                'cumulative_count': cumulative_count
+            }
+            for day_number, (daily_count, cumulative_count) in enumerate(zip(daily_dus.tolist(), daily_dus.cumsum().tolist()))
+        ]
+    
+    # Process clumped DUs progress data
+    if clumped_dus_by_day:
+        last_clumped_date = max(clumped_dus_by_day.keys())
+        
+        # Create a complete date range, starting from the first DU completion
+        daily_clumped = _daily_counts_series(clumped_dus_by_day, first_completion_date, last_clumped_date)
+        
+        # Unique FLWs who completed clumped DUs in the past N days, per day of the range
+        clumped_day_idx = (pd.to_datetime(clumped_completions['completion_date']) - pd.Timestamp(first_completion_date)).dt.days.to_numpy()
+        flws_in_lookback_by_day = _rolling_unique_flws(clumped_day_idx, clumped_flw_idx, len(daily_clumped), lookback_days)
+        
+        clumped_progress = [
+            {
+                'day': day_number,
+                'daily_count': daily_count,
+                'cumulative_count': cumulative_count,
+                'unique_flws_in_lookback': flws_in_lookback.tolist(),
+                'unique_flws_count_in_lookback': len(flws_in_lookback)
+            }
+            for day_number, (daily_count, cumulative_count, flws_in_lookback) in enumerate(zip(daily_clumped.tolist(), daily_clumped.cumsum().tolist(), flws_in_lookback_by_day))
+        ]
+        
+        # 'unique_flws_in_lookback' holds indices into 'flw_ids'
+        project_progress['clumped_progress'] = {
+            'flw_ids': clumped_flw_ids.tolist(),
+            'rows': clumped_progress
+        }
+    
+    return project_progress
+
+
+def _parse_visit_days(visit_dates: pd.Series) -> pd.Series:
+    """
+    Parse visit dates to calendar days, dropping values that cannot be parsed.
+    
+    All values are parsed in one vectorized call. If they carry different UTC offsets (mixed
+    zones, naive next to offset strings, or one zone across a DST change) pandas cannot hold
+    them in one datetime column, so each value is parsed on its own instead. Either way the day
+    is taken from the visit's local wall-clock time, not converted to UTC.
+    
+    Args:
+        visit_dates: Series of visit date strings or timestamps
+        
+    Returns:
+        pd.Series: datetime.date of each parseable visit
+    """
+    try:
+        # Older pandas warns and returns an object column for mixed offsets; that is handled below
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            parsed = pd.to_datetime(visit_dates, errors='coerce', format='mixed')
+    except ValueError:
+        parsed = None
+    
+    if parsed is not None and pd.api.types.is_datetime64_any_dtype(parsed):
+        return parsed.dropna().dt.date
+    
+    # Mixed offsets - parse each value separately, keeping its own offset
+    parsed = visit_dates.map(lambda visit_date: pd.to_datetime(visit_date, errors='coerce'))
+    return parsed[parsed.notna()].map(lambda visit_timestamp: visit_timestamp.date())
+
+
+def _daily_counts_series(counts_by_day: Dict[date, int], first_date: date, last_date: date) -> pd.Series:
+    """
+    Expand sparse per-day counts into a dense daily series.
+    
+    Args:
+        counts_by_day: Dictionary mapping dates to counts
+        first_date: First date of the range (inclusive)
+        last_date: Last date of the range (inclusive)
+        
+    Returns:
+        pd.Series: Counts indexed by every date in the range, with missing days filled with 0
+    """
+    days = pd.date_range(first_date, last_date, freq='D').date
+    return pd.Series(counts_by_day, dtype='int64').reindex(days, fill_value=0)
+
+
+def _rolling_unique_flws(day_idx: np.ndarray, flw_idx: np.ndarray, n_days: int, lookback_days: int) -> List[np.ndarray]:
+    """
+    Find the FLWs with at least one event in the trailing lookback window of each day.
+    
+    Each FLW event keeps that FLW in the window for lookback_days days, cut short where the
+    same FLW's next event starts, so every FLW covers disjoint runs of days. Expanding those
+    runs gives (day, FLW) pairs that are unique per day.
+    
+    Args:
+        day_idx: Day of each event, as days since the start of the range
+        flw_idx: Integer FLW index of each event
+        n_days: Number of days in the range
+        lookback_days: Length of the window in days, including the current day
+        
+    Returns:
+        List with one array of FLW indices per day of the range
+    """
+    if lookback_days < 1 or len(day_idx) == 0:
+        return [np.empty(0, dtype=np.int64) for _ in range(n_days)]
+    
+    # One event per FLW per day, ordered by FLW then day
+    events = np.unique(np.column_stack([np.asarray(flw_idx, dtype=np.int64), np.asarray(day_idx, dtype=np.int64)]), axis=0)
+    flws, starts = events[:, 0], events[:, 1]
     
-    html_content = f"""<!DOCTYPE html>
+    # Half-open run of days [start, end) each event keeps its FLW in the window
+    ends = np.minimum(starts + lookback_days, n_days)
+    next_starts = np.r_[starts[1:], n_days]
+    same_flw_next = np.r_[flws[1:] == flws[:-1], False]
+    ends = np.where(same_flw_next, np.minimum(ends, next_starts), ends)
+    run_lengths = ends - starts
+    
+    # Expand runs into (day, FLW) pairs and group them by day
+    run_offsets = np.arange(run_lengths.sum()) - np.repeat(np.cumsum(run_lengths) - run_lengths, run_lengths)
+    covered_days = np.repeat(starts, run_lengths) + run_offsets
+    covered_flws = np.repeat(flws, run_lengths)
+    order = np.argsort(covered_days, kind='stable')
+    flws_per_day = np.bincount(covered_days, minlength=n_days)
+    return np.split(covered_flws[order], np.cumsum(flws_per_day)[:-1])
+
+
+# Report HTML sections, compiled once per process. The project rows and the progress data
+# JSON are written between the sections so the document is never held in memory as a whole.
+_REPORT_HEADER_TEMPLATE = Template("""<!DOCTYPE html>
 <html>
 <head>
-    <title>{report_title}</title>
+    <title>$report_title</title>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
     <style>
-        body {{
+        body {
             font-family: Arial, sans-serif;
             margin: 0;
             padding: 20px;
             background-color: #f5f5f5;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1400px;
             margin: 0 auto;
             background-color: white;
             padding: 20px;
             border-radius: 5px;
             box-shadow: 0 0 10px rgba(0,0,0,0.1);
-        }}
-        h1, h2 {{
+        }
+        h1, h2 {
             color: #333;
             border-bottom: 1px solid #ddd;
             padding-bottom: 10px;
-        }}
-        .summary-stats {{
+        }
+        .summary-stats {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 20px;
             margin: 20px 0;
-        }}
-        .stat-card {{
+        }
+        .stat-card {
             background-color: #f8f9fa;
             padding: 15px;
             border-radius: 5px;
             text-align: center;
             border-left: 4px solid #4CAF50;
-        }}
-        .stat-value {{
+        }
+        .stat-value {
             font-size: 2em;
             font-weight: bold;
             color: #4CAF50;
-        }}
-        .stat-label {{
+        }
+        .stat-label {
             color: #666;
             margin-top: 5px;
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
             margin: 20px 0;
-        }}
-        th, td {{
+        }
+        th, td {
             border: 1px solid #ddd;
             padding: 12px;
             text-align: left;
-        }}
-        th {{
+        }
+        th {
             background-color: #f2f2f2;
             font-weight: bold;
-        }}
-        tr:nth-child(even) {{
+        }
+        tr:nth-child(even) {
             background-color: #f9f9f9;
-        }}
-        .chart-container {{
+        }
+        .chart-container {
             margin: 30px 0;
             padding: 20px;
             background-color: #fafafa;
             border-radius: 5px;
-        }}
-        .chart-grid {{
+        }
+        .chart-grid {
             display: grid;
             grid-template-columns: 1fr 1fr;
             gap: 30px;
             margin: 20px 0;
-        }}
-        .chart-item {{
+        }
+        .chart-item {
             background-color: white;
             padding: 15px;
             border-radius: 5px;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .chart-title {{
+        }
+        .chart-title {
             font-size: 1.2em;
             font-weight: bold;
             margin-bottom: 15px;
             color: #333;
-        }}
-        .timestamp {{
+        }
+        .timestamp {
             color: #777;
             font-size: 0.9em;
             margin-top: 30px;
-        }}
-        .note {{
+        }
+        .note {
             background-color: #e3f2fd;
             border: 1px solid #2196F3;
             color: #1565C0;
             padding: 10px;
             border-radius: 5px;
             margin: 20px 0;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
-        <h1>{report_title}</h1>
+        <h1>$report_title</h1>
         
         <div class="note">
-            <strong>Note:</strong> {note_text}
+            <strong>Note:</strong> $note_text
         </div>
         
         <h2>Summary Statistics</h2>
         <div class="summary-stats">
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['project_count']}</div>
+                <div class="stat-value">$project_count</div>
                 <div class="stat-label">Total Projects</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['summary_comparisons']['total_delivery_units']}</div>
+                <div class="stat-value">$total_delivery_units</div>
                 <div class="stat-label">Total Delivery Units</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['summary_comparisons']['total_completed_dus']}</div>
+                <div class="stat-value">$total_completed_dus</div>
                 <div class="stat-label">Completed DUs</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['summary_comparisons']['total_service_areas']}</div>
+                <div class="stat-value">$total_service_areas</div>
                 <div class="stat-label">Total Service Areas</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['summary_comparisons']['total_started_sas']}</div>
+                <div class="stat-value">$total_started_sas</div>
                 <div class="stat-label">Started SAs</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['summary_comparisons']['total_completed_sas']}</div>
+                <div class="stat-value">$total_completed_sas</div>
                 <div class="stat-label">Completed SAs</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['summary_comparisons']['total_service_points']}</div>
+                <div class="stat-value">$total_service_points</div>
                 <div class="stat-label">Total Service Points</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['summary_comparisons']['average_coverage']:.1f}%</div>
+                <div class="stat-value">$average_coverage%</div>
                 <div class="stat-label">Average Coverage</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{comparison_stats['summary_comparisons']['total_flws']}</div>
+                <div class="stat-value">$total_flws</div>
                 <div class="stat-label">Total FLWs</div>
             </div>
         </div>
@@ -509,7 +601,28 @@ def _generate_html_report(comparison_stats: Dict[str, Any], coverage_data_object
                 </tr>
             </thead>
             <tbody>
-                {project_rows}
+                """)
+
+_PROJECT_ROW_TEMPLATE = Template("""
+        <tr>
+            <td>$opportunity_name</td>
+            <td>$project_space</td>
+            <td>$delivery_units_count</td>
+            <td>$completed_dus_count</td>
+            <td>$dus_per_day</td>
+            <td>$service_points_count</td>
+            <td>$visits_per_day</td>
+            <td>$total_service_areas</td>
+            <td>$started_sas_count</td>
+            <td>$completed_sas_count</td>
+            <td>$total_flws</td>
+            <td>$active_flw_last7days</td>
+            <td>$pct_active_flw_last7days%</td>
+            <td>$coverage_percentage%</td>
+        </tr>
+        """)
+
+_REPORT_CHARTS_TEMPLATE = Template("""
             </tbody>
         </table>
         
@@ -533,184 +646,231 @@ def _generate_html_report(comparison_stats: Dict[str, Any], coverage_data_object
                 <div id="cumulative-du-chart" style="height: 400px;"></div>
             </div>
             <div class="chart-item">
-                <div class="chart-title">FLWs clumping in trailing {lookback_days} days</div>
+                <div class="chart-title">FLWs clumping in trailing $lookback_days days</div>
                 <div id="flws-clumping-chart" style="height: 400px;"></div>
             </div>
         </div>
         
-        <p class="timestamp">Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
+        <p class="timestamp">Generated on: $generated_on</p>
     </div>
 
     <script>
         // Progress data from Python
-        const progressData = {progress_data_json};
+        const progressData = """)
+
+_REPORT_SCRIPTS = """;
         
         // Color palette for different opportunities
         const colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf'];
         
         // Create daily service deliveries chart
-        function createDailyServiceChart() {{
+        function createDailyServiceChart() {
             const traces = [];
             let colorIndex = 0;
             
-            for (const [opportunity, data] of Object.entries(progressData.service_delivery_progress)) {{
-                if (data && data.length > 0) {{
-                    traces.push({{
+            for (const [opportunity, data] of Object.entries(progressData.service_delivery_progress)) {
+                if (data && data.length > 0) {
+                    traces.push({
                         x: data.map(d => d.day),
                         y: data.map(d => d.daily_count),
                         type: 'scatter',
                         mode: 'lines+markers',
                         name: opportunity,
-                        line: {{ color: colors[colorIndex % colors.length] }},
-                        marker: {{ size: 6 }}
-                    }});
+                        line: { color: colors[colorIndex % colors.length] },
+                        marker: { size: 6 }
+                    });
                     colorIndex++;
-                }}
-            }}
+                }
+            }
             
-            const layout = {{
-                xaxis: {{ title: 'Days Since First Active Day' }},
-                yaxis: {{ title: 'Number of Service Deliveries' }},
+            const layout = {
+                xaxis: { title: 'Days Since First Active Day' },
+                yaxis: { title: 'Number of Service Deliveries' },
                 hovermode: 'x unified',
                 showlegend: true,
-                margin: {{ l: 50, r: 50, t: 30, b: 50 }}
-            }};
+                margin: { l: 50, r: 50, t: 30, b: 50 }
+            };
             
-            Plotly.newPlot('daily-service-chart', traces, layout, {{responsive: true}});
-        }}
+            Plotly.newPlot('daily-service-chart', traces, layout, {responsive: true});
+        }
         
         // Create daily DU completions chart
-        function createDailyDUChart() {{
+        function createDailyDUChart() {
             const traces = [];
             let colorIndex = 0;
             
-            for (const [opportunity, data] of Object.entries(progressData.du_completion_progress)) {{
-                if (data && data.length > 0) {{
-                    traces.push({{
+            for (const [opportunity, data] of Object.entries(progressData.du_completion_progress)) {
+                if (data && data.length > 0) {
+                    traces.push({
                         x: data.map(d => d.day),
                         y: data.map(d => d.daily_count),
                         type: 'scatter',
                         mode: 'lines+markers',
                         name: opportunity,
-                        line: {{ color: colors[colorIndex % colors.length] }},
-                        marker: {{ size: 6 }}
-                    }});
+                        line: { color: colors[colorIndex % colors.length] },
+                        marker: { size: 6 }
+                    });
                     colorIndex++;
-                }}
-            }}
+                }
+            }
             
-            const layout = {{
-                xaxis: {{ title: 'Days Since First Active Day' }},
-                yaxis: {{ title: 'Number of DUs Completed' }},
+            const layout = {
+                xaxis: { title: 'Days Since First Active Day' },
+                yaxis: { title: 'Number of DUs Completed' },
                 hovermode: 'x unified',
                 showlegend: true,
-                margin: {{ l: 50, r: 50, t: 30, b: 50 }}
-            }};
+                margin: { l: 50, r: 50, t: 30, b: 50 }
+            };
             
-            Plotly.newPlot('daily-du-chart', traces, layout, {{responsive: true}});
-        }}
+            Plotly.newPlot('daily-du-chart', traces, layout, {responsive: true});
+        }
         
         // Create cumulative service deliveries chart
-        function createCumulativeServiceChart() {{
+        function createCumulativeServiceChart() {
             const traces = [];
             let colorIndex = 0;
             
-            for (const [opportunity, data] of Object.entries(progressData.cumulative_service_delivery)) {{
-                if (data && data.length > 0) {{
-                    traces.push({{
+            for (const [opportunity, data] of Object.entries(progressData.service_delivery_progress)) {
+                if (data && data.length > 0) {
+                    traces.push({
                         x: data.map(d => d.day),
                         y: data.map(d => d.cumulative_count),
                         type: 'scatter',
                         mode: 'lines',
                         name: opportunity,
-                        line: {{ color: colors[colorIndex % colors.length], width: 3 }}
-                    }});
+                        line: { color: colors[colorIndex % colors.length], width: 3 }
+                    });
                     colorIndex++;
-                }}
-            }}
+                }
+            }
             
-            const layout = {{
-                xaxis: {{ title: 'Days Since First Active Day' }},
-                yaxis: {{ title: 'Cumulative Service Deliveries' }},
+            const layout = {
+                xaxis: { title: 'Days Since First Active Day' },
+                yaxis: { title: 'Cumulative Service Deliveries' },
                 hovermode: 'x unified',
                 showlegend: true,
-                margin: {{ l: 50, r: 50, t: 30, b: 50 }}
-            }};
+                margin: { l: 50, r: 50, t: 30, b: 50 }
+            };
             
-            Plotly.newPlot('cumulative-service-chart', traces, layout, {{responsive: true}});
-        }}
+            Plotly.newPlot('cumulative-service-chart', traces, layout, {responsive: true});
+        }
         
         // Create cumulative DU completions chart
-        function createCumulativeDUChart() {{
+        function createCumulativeDUChart() {
             const traces = [];
             let colorIndex = 0;
             
-            for (const [opportunity, data] of Object.entries(progressData.cumulative_du_completion)) {{
-                if (data && data.length > 0) {{
-                    traces.push({{
+            for (const [opportunity, data] of Object.entries(progressData.du_completion_progress)) {
+                if (data && data.length > 0) {
+                    traces.push({
                         x: data.map(d => d.day),
                         y: data.map(d => d.cumulative_count),
                         type: 'scatter',
                         mode: 'lines',
                         name: opportunity,
-                        line: {{ color: colors[colorIndex % colors.length], width: 3 }}
-                    }});
+                        line: { color: colors[colorIndex % colors.length], width: 3 }
+                    });
                     colorIndex++;
-                }}
-            }}
+                }
+            }
             
-            const layout = {{
-                xaxis: {{ title: 'Days Since First Active Day' }},
-                yaxis: {{ title: 'Cumulative DUs Completed' }},
+            const layout = {
+                xaxis: { title: 'Days Since First Active Day' },
+                yaxis: { title: 'Cumulative DUs Completed' },
                 hovermode: 'x unified',
                 showlegend: true,
-                margin: {{ l: 50, r: 50, t: 30, b: 50 }}
-            }};
+                margin: { l: 50, r: 50, t: 30, b: 50 }
+            };
             
-            Plotly.newPlot('cumulative-du-chart', traces, layout, {{responsive: true}});
-        }}
+            Plotly.newPlot('cumulative-du-chart', traces, layout, {responsive: true});
+        }
         
         // Create FLWs clumping chart
-        function createFLWsClumpingChart() {{
+        function createFLWsClumpingChart() {
             const traces = [];
             let colorIndex = 0;
             
-            for (const [opportunity, data] of Object.entries(progressData.clumped_dus_progress)) {{
-                if (data && data.length > 0) {{
-                    traces.push({{
-                        x: data.map(d => d.day),
-                        y: data.map(d => d.unique_flws_count_in_lookback),
+            for (const [opportunity, data] of Object.entries(progressData.clumped_dus_progress)) {
+                const rows = data ? data.rows : null;
+                if (rows && rows.length > 0) {
+                    traces.push({
+                        x: rows.map(d => d.day),
+                        y: rows.map(d => d.unique_flws_count_in_lookback),
                         type: 'scatter',
                         mode: 'lines+markers',
                         name: opportunity,
-                        line: {{ color: colors[colorIndex % colors.length] }},
-                        marker: {{ size: 6 }}
-                    }});
+                        line: { color: colors[colorIndex % colors.length] },
+                        marker: { size: 6 }
+                    });
                     colorIndex++;
-                }}
-            }}
+                }
+            }
             
-            const layout = {{
-                xaxis: {{ title: 'Days Since First Active Day' }},
-                yaxis: {{ title: 'Number of Unique FLWs' }},
+            const layout = {
+                xaxis: { title: 'Days Since First Active Day' },
+                yaxis: { title: 'Number of Unique FLWs' },
                 hovermode: 'x unified',
                 showlegend: true,
-                margin: {{ l: 50, r: 50, t: 30, b: 50 }}
-            }};
+                margin: { l: 50, r: 50, t: 30, b: 50 }
+            };
             
-            Plotly.newPlot('flws-clumping-chart', traces, layout, {{responsive: true}});
-        }}
+            Plotly.newPlot('flws-clumping-chart', traces, layout, {responsive: true});
+        }
         
         // Initialize all charts when page loads
-        document.addEventListener('DOMContentLoaded', function() {{
+        document.addEventListener('DOMContentLoaded', function() {
             createDailyServiceChart();
             createDailyDUChart();
             createCumulativeServiceChart();
             createCumulativeDUChart();
             createFLWsClumpingChart();
-        }});
+        });
     </script>
 </body>
 </html>"""
+
+
+def _write_html_report(f, comparison_stats: Dict[str, Any], coverage_data_objects: Dict[str, CoverageData], progress_data: Dict[str, Any], lookback_days: int = 10) -> None:
+    """
+    Write the HTML comparison report to an open file, one section at a time.
+    
+    Args:
+        f: Open text file to write the report to
+        comparison_stats: Dictionary containing comparison statistics
+        coverage_data_objects: Dictionary mapping project keys to CoverageData objects
+        progress_data: Dictionary containing progress data for charts
+        lookback_days: Number of days to look back for unique FLW calculation
+    """
+    
+    # Determine if this is a single project or comparison
+    is_single_project = len(coverage_data_objects) == 1
+    report_title = "Opportunity Analysis Report" if is_single_project else "Opportunity Comparison Report"
+    note_text = "Progress charts show days since the opportunity's first active day (Day 0 = first service delivery or DU completion)." if is_single_project else "Progress charts show days since each opportunity's first active day (Day 0 = first service delivery or DU completion for that opportunity)."
+    
+    # Page header, summary statistics and comparison table header
+    summary = comparison_stats['summary_comparisons']
+    f.write(_REPORT_HEADER_TEMPLATE.substitute(
+        summary,
+        report_title=report_title,
+        note_text=note_text,
+        project_count=comparison_stats['project_count'],
+        average_coverage=f"{summary['average_coverage']:.1f}"
+    ))
+    
+    # Generate project comparison table, escaping names taken from the data
+    for project_stats in comparison_stats['projects'].values():
+        f.write(_PROJECT_ROW_TEMPLATE.substitute(
+            project_stats,
+            opportunity_name=html.escape(str(project_stats['opportunity_name'])),
+            project_space=html.escape(str(project_stats['project_space'])),
+            pct_active_flw_last7days=f"{project_stats['pct_active_flw_last7days']:.1f}",
+            coverage_percentage=f"{project_stats['coverage_percentage']:.1f}"
+        ))
     
-    return html_content 
\ No newline at end of file
+    # Charts, with the progress data as compact JSON for JavaScript
+    f.write(_REPORT_CHARTS_TEMPLATE.substitute(
+        lookback_days=lookback_days,
+        generated_on=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ))
+    f.write(json.dumps(progress_data, default=str, separators=(',', ':')))
+    f.write(_REPORT_SCRIPTS)
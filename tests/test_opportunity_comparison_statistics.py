@@ -0,0 +1,148 @@
+import os
+import sys
+import pytest
+import numpy as np
+from datetime import date
+
+# Add the src directory to the path so we can import the modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.opportunity_comparison_statistics import _rolling_unique_flws, _compute_project_progress
+
+
+def brute_force_unique_flws(day_idx, flw_idx, n_days, lookback_days):
+    """Unique FLWs per day, found by scanning every event for every day's window."""
+    return [
+        sorted({flw for day, flw in zip(day_idx, flw_idx) if current_day - lookback_days + 1 <= day <= current_day})
+        for current_day in range(n_days)
+    ]
+
+
+class TestRollingUniqueFlws:
+    """Tests for the vectorized rolling unique FLW kernel."""
+
+    def assert_matches_brute_force(self, day_idx, flw_idx, n_days, lookback_days):
+        """Check the kernel against the brute-force window and that no FLW repeats within a day."""
+        result = _rolling_unique_flws(np.array(day_idx, dtype=np.int64), np.array(flw_idx, dtype=np.int64), n_days, lookback_days)
+        expected = brute_force_unique_flws(day_idx, flw_idx, n_days, lookback_days)
+
+        assert len(result) == n_days
+        for day, (flws, expected_flws) in enumerate(zip(result, expected)):
+            assert sorted(flws.tolist()) == expected_flws, f"Mismatch on day {day}"
+            assert len(set(flws.tolist())) == len(flws), f"Duplicate FLW on day {day}"
+        return result
+
+    @pytest.mark.parametrize('lookback_days', [0, 1])
+    def test_minimal_lookback(self, lookback_days):
+        """A zero-day window is always empty and a one-day window only covers the current day."""
+        result = self.assert_matches_brute_force([0, 2, 2, 5], [0, 1, 2, 0], 7, lookback_days)
+        if lookback_days == 0:
+            assert all(len(flws) == 0 for flws in result)
+        else:
+            assert sorted(result[2].tolist()) == [1, 2]
+            assert len(result[3]) == 0
+
+    def test_same_flw_on_consecutive_days(self):
+        """Overlapping windows from one FLW's consecutive events count that FLW once."""
+        result = self.assert_matches_brute_force([3, 4, 5, 6], [1, 1, 1, 1], 12, 3)
+        assert [len(flws) for flws in result] == [0, 0, 0, 1, 1, 1, 1, 1, 1, 0, 0, 0]
+
+    def test_same_flw_with_gap_longer_than_window(self):
+        """An FLW drops out of the window between events further apart than the lookback."""
+        result = self.assert_matches_brute_force([1, 9], [4, 4], 14, 3)
+        assert [len(flws) for flws in result] == [0, 1, 1, 1, 0, 0, 0, 0, 0, 1, 1, 1, 0, 0]
+
+    def test_several_events_for_one_flw_on_one_day(self):
+        """Multiple clumped DUs by one FLW on a day count as a single FLW."""
+        result = self.assert_matches_brute_force([2, 2, 2, 3], [0, 0, 0, 1], 6, 2)
+        assert result[2].tolist() == [0]
+        assert sorted(result[3].tolist()) == [0, 1]
+
+    def test_window_cut_off_at_end_of_range(self):
+        """Windows that would extend past the last day are truncated to n_days."""
+        result = self.assert_matches_brute_force([0, 3, 4], [0, 1, 2], 5, 10)
+        assert [len(flws) for flws in result] == [1, 1, 1, 2, 3]
+
+    def test_no_events(self):
+        """Without events every day has no FLWs."""
+        result = self.assert_matches_brute_force([], [], 4, 10)
+        assert all(len(flws) == 0 for flws in result)
+
+    def test_random_events(self):
+        """Random events across many lookback lengths match the brute-force window."""
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            n_days = int(rng.integers(1, 30))
+            n_events = int(rng.integers(0, 25))
+            day_idx = rng.integers(0, n_days, n_events).tolist()
+            flw_idx = rng.integers(0, 5, n_events).tolist()
+            self.assert_matches_brute_force(day_idx, flw_idx, n_days, int(rng.integers(0, 12)))
+
+
+def completed_du_inputs(services_counts, buildings):
+    """Progress inputs for completed DUs finished on the same day by different FLWs."""
+    flw_commcare_ids = [f"cc-{i}" for i in range(len(services_counts))]
+    return {
+        'visit_dates': [],
+        'completion_dates': [date(2024, 1, 1)] * len(services_counts),
+        'completion_flw_commcare_ids': flw_commcare_ids,
+        'completion_services_counts': services_counts,
+        'completion_buildings': buildings,
+        'flw_id_by_commcare_id': {commcare_id: f"flw-{commcare_id}" for commcare_id in flw_commcare_ids}
+    }
+
+
+class TestClumpedDUs:
+    """Tests for how completed DUs are flagged as clumped."""
+
+    def test_zero_buildings_with_services_is_clumped(self):
+        """A DU with no buildings but at least one service point counts as clumped."""
+        progress = _compute_project_progress(completed_du_inputs([1], [0]), clumping_ratio=10.0, lookback_days=10)
+
+        assert progress['clumped_progress'] is not None
+        assert progress['clumped_progress']['flw_ids'] == ['flw-cc-0']
+        assert progress['clumped_progress']['rows'][0]['daily_count'] == 1
+        assert progress['clumped_progress']['rows'][0]['unique_flws_count_in_lookback'] == 1
+
+    def test_zero_buildings_without_services_is_not_clumped(self):
+        """A DU with no buildings and no service points is not clumped."""
+        progress = _compute_project_progress(completed_du_inputs([0], [0]), clumping_ratio=10.0, lookback_days=10)
+
+        assert progress['du_progress'][0]['daily_count'] == 1
+        assert progress['clumped_progress'] is None
+
+    def test_services_equal_to_ratio_times_buildings_is_not_clumped(self):
+        """Services exactly at clumping_ratio * buildings stay below the clumping threshold."""
+        progress = _compute_project_progress(completed_du_inputs([20], [2]), clumping_ratio=10.0, lookback_days=10)
+
+        assert progress['du_progress'][0]['daily_count'] == 1
+        assert progress['clumped_progress'] is None
+
+    def test_services_above_ratio_times_buildings_is_clumped(self):
+        """Only the DU above the threshold is counted when both sides of the boundary are present."""
+        progress = _compute_project_progress(completed_du_inputs([20, 21], [2, 2]), clumping_ratio=10.0, lookback_days=10)
+
+        assert progress['du_progress'][0]['daily_count'] == 2
+        assert progress['clumped_progress']['flw_ids'] == ['flw-cc-1']
+        assert progress['clumped_progress']['rows'][0]['daily_count'] == 1
+
+
+class TestServiceDeliveryProgress:
+    """Tests for the daily service delivery series."""
+
+    def test_mixed_utc_offsets_use_local_visit_day(self):
+        """Visit dates with different UTC offsets are counted on their local calendar day."""
+        progress_inputs = completed_du_inputs([], [])
+        progress_inputs['visit_dates'] = [
+            '2024-01-01T10:00:00+05:30',
+            '2024-01-01T22:00:00-05:00',  # 03:00 UTC on Jan 2, but Jan 1 locally
+            '2024-01-02T08:00:00Z',
+            '2024-01-02 09:00',
+            'not a date'
+        ]
+        progress = _compute_project_progress(progress_inputs, clumping_ratio=10.0, lookback_days=10)
+
+        assert progress['service_progress'] == [
+            {'day': 0, 'daily_count': 2, 'cumulative_count': 2},
+            {'day': 1, 'daily_count': 2, 'cumulative_count': 4}
+        ]